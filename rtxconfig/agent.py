@@ -0,0 +1,409 @@
+"""Local agent keeping an RTX830 SSH session open between CLI invocations."""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import stat
+import socket
+import struct
+import hashlib
+import tempfile
+import subprocess
+import socketserver
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO, Iterator
+import logging
+
+from .connection import RTXConnection, RTXConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Methods of RTXConnection that clients may call through the agent
+AGENT_METHODS = (
+    'execute_command',
+    'send_config_commands',
+    'get_running_config',
+    'save_config',
+    'get_status_info',
+)
+
+# Seconds to wait for the agent to answer a ping and a method call
+AGENT_PING_TIMEOUT = 2
+AGENT_CALL_TIMEOUT = 120
+
+
+def socket_path(config: Dict[str, Any]) -> Path:
+    """Get agent socket path for a connection configuration.
+
+    Args:
+        config: Connection configuration dictionary
+
+    Returns:
+        Path to the agent's Unix socket
+    """
+    # Connection parameters are part of the name so changed settings get a new agent
+    params = json.dumps(config, sort_keys=True, default=str)
+    digest = hashlib.sha256(params.encode('utf-8')).hexdigest()[:12]
+
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / f"rtxconfig-{config['host']}-{digest}.sock"
+    # The shared temp dir is world writable, keep sockets in a private subdirectory
+    return Path(tempfile.gettempdir()) / f"rtxconfig-{os.getuid()}" / f"{config['host']}-{digest}.sock"
+
+
+def _ensure_socket_dir(path: Path) -> None:
+    """Create the agent socket directory and check only the user can access it.
+
+    Args:
+        path: Path to the agent's Unix socket
+
+    Raises:
+        RTXConnectionError: If the directory is not private to the current user
+    """
+    directory = path.parent
+    try:
+        directory.mkdir(mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+    except OSError as e:
+        raise RTXConnectionError(f"Cannot create agent socket directory {directory}: {e}")
+
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+            or st.st_mode & 0o077):
+        raise RTXConnectionError(
+            f"Agent socket directory {directory} must be a directory only accessible by the current user"
+        )
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """Get the user id of the process at the other end of a Unix socket.
+
+    Args:
+        sock: Connected Unix socket
+
+    Returns:
+        Peer user id, or None if the platform does not support SO_PEERCRED
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _pid, uid, _gid = struct.unpack('3i', creds)
+    return uid
+
+
+class AgentConnection:
+    """RTX830 connection proxied through a local agent process."""
+
+    def __init__(self, config: Dict[str, Any], path: Path):
+        """Initialize agent connection.
+
+        Args:
+            config: Connection configuration dictionary
+            path: Path to the agent's Unix socket
+        """
+        self.config = config
+        self.path = path
+
+    def _call(self, method: str, *args: Any, timeout: float = AGENT_CALL_TIMEOUT) -> Any:
+        """Call a connection method in the agent.
+
+        Args:
+            method: Method name
+            *args: Method arguments
+            timeout: Seconds to wait for the agent
+
+        Returns:
+            Method result
+
+        Raises:
+            RTXConnectionError: If the agent is unreachable or the call fails
+        """
+        request = json.dumps({'method': method, 'args': list(args)}).encode('utf-8')
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(str(self.path))
+                # Do not send commands to a socket planted by another user
+                uid = _peer_uid(sock)
+                if uid is not None and uid != os.getuid():
+                    raise RTXConnectionError(f"Agent socket {self.path} is owned by uid {uid}")
+                sock.sendall(request + b"\n")
+                with sock.makefile('rb') as f:
+                    line = f.readline()
+        except OSError as e:
+            raise RTXConnectionError(f"Agent communication failed: {e}")
+
+        if not line:
+            raise RTXConnectionError("Agent closed connection without response")
+
+        try:
+            response = json.loads(line)
+            ok = response['ok']
+            payload = response['result'] if ok else response['error']
+        except (ValueError, TypeError, KeyError) as e:
+            raise RTXConnectionError(f"Invalid agent response: {e}")
+        if not ok:
+            raise RTXConnectionError(payload)
+        return payload
+
+    def ping(self) -> bool:
+        """Check whether the agent is reachable."""
+        try:
+            self._call('ping', timeout=AGENT_PING_TIMEOUT)
+            return True
+        except RTXConnectionError:
+            return False
+
+    def connect(self) -> None:
+        """Connection is held by the agent, nothing to do."""
+
+    def disconnect(self) -> None:
+        """Leave the agent's session open for later invocations."""
+
+    def is_connected(self) -> bool:
+        """Check if the agent is reachable."""
+        return self.ping()
+
+    def execute_command(self, command: str, expect_string: Optional[str] = None) -> str:
+        """Execute command on RTX830 through the agent."""
+        return self._call('execute_command', command, expect_string)
+
+    def send_config_commands(self, commands: list[str]) -> str:
+        """Send configuration commands to RTX830 through the agent."""
+        return self._call('send_config_commands', commands)
+
+    def get_running_config(self) -> str:
+        """Get current running configuration through the agent."""
+        return self._call('get_running_config')
+
+    def stream_command(self, command: str, fh: BinaryIO) -> int:
+        """Execute command through the agent and write its output to a file."""
+        data = self.execute_command(command).encode('utf-8')
+        fh.write(data)
+        return len(data)
+
+    def stream_running_config(self, fh: BinaryIO) -> int:
+        """Write current running configuration to a file."""
+        data = self.get_running_config().encode('utf-8')
+        fh.write(data)
+        return len(data)
+
+    def save_config(self) -> str:
+        """Save current configuration to flash through the agent."""
+        return self._call('save_config')
+
+    def get_status_info(self) -> Dict[str, str]:
+        """Get various status information through the agent."""
+        return self._call('get_status_info')
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+
+
+@contextmanager
+def _agent_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock for starting the agent of a socket.
+
+    Args:
+        path: Path to the agent's Unix socket
+    """
+    fd = os.open(path.with_name(f"{path.name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def connect_agent(config: Dict[str, Any]) -> Optional[AgentConnection]:
+    """Connect to the agent for a configuration, starting it if needed.
+
+    Args:
+        config: Connection configuration dictionary
+
+    Returns:
+        AgentConnection, or None if no agent could be reached
+    """
+    path = socket_path(config)
+    try:
+        _ensure_socket_dir(path)
+    except RTXConnectionError as e:
+        logger.warning(f"Not using agent: {e}")
+        return None
+
+    agent = AgentConnection(config, path)
+    if agent.ping():
+        logger.debug(f"Using running agent: {path}")
+        return agent
+
+    # Concurrent invocations would each start an agent, and the last one
+    # would unlink the others' sockets while their SSH sessions stay open
+    try:
+        with _agent_lock(path):
+            if agent.ping():
+                logger.debug(f"Using agent started concurrently: {path}")
+                return agent
+            return _start_agent(config, agent)
+    except OSError as e:
+        logger.warning(f"Failed to lock agent socket: {e}")
+        return None
+
+
+def _start_agent(config: Dict[str, Any], agent: AgentConnection) -> Optional[AgentConnection]:
+    """Start an agent process and wait until it answers.
+
+    Args:
+        config: Connection configuration dictionary
+        agent: Connection to the agent's socket
+
+    Returns:
+        AgentConnection, or None if the agent failed to start
+    """
+    path = agent.path
+    logger.info(f"Starting agent: {path}")
+    try:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'rtxconfig.agent'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=Path(__file__).resolve().parent.parent,
+            start_new_session=True,
+        )
+        # Pass configuration on stdin to keep secrets out of the process list
+        process.stdin.write(json.dumps(config).encode('utf-8'))
+        process.stdin.close()
+    except OSError as e:
+        logger.warning(f"Failed to start agent: {e}")
+        return None
+
+    # The agent creates its socket once the SSH session is established
+    deadline = time.monotonic() + (
+        config.get('conn_timeout', 10) + config.get('banner_timeout', 15)
+        + config.get('auth_timeout', 15)
+    )
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            logger.warning(f"Agent exited with status {process.returncode}")
+            return None
+        if path.exists() and agent.ping():
+            return agent
+        time.sleep(0.1)
+
+    # Do not leave a late agent holding an SSH session nobody waits for
+    process.terminate()
+    logger.warning("Timed out waiting for agent")
+    return None
+
+
+class _AgentServer(socketserver.UnixStreamServer):
+    """Unix socket server owning a single RTX connection."""
+
+    def __init__(self, path: Path, connection: RTXConnection, idle_timeout: float):
+        self.connection = connection
+        self.timeout = idle_timeout
+        self.idle = False
+        super().__init__(str(path), _AgentRequestHandler)
+
+    def verify_request(self, request, client_address) -> bool:
+        """Only serve clients running as the agent's user."""
+        uid = _peer_uid(request)
+        if uid is not None and uid != os.getuid():
+            logger.warning(f"Rejected agent client with uid {uid}")
+            return False
+        return True
+
+    def handle_timeout(self) -> None:
+        """Stop serving after idle timeout."""
+        self.idle = True
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a client request.
+
+        Args:
+            request: Request with method name and arguments
+
+        Returns:
+            Response dictionary
+        """
+        method = request.get('method')
+        if method == 'ping':
+            return {'ok': True, 'result': None}
+        if method not in AGENT_METHODS:
+            return {'ok': False, 'error': f"Unsupported agent method: {method}"}
+
+        try:
+            # Reconnects if the device dropped the session
+            self.connection.connect()
+            result = getattr(self.connection, method)(*request.get('args', []))
+            return {'ok': True, 'result': result}
+        except Exception as e:
+            logger.warning(f"Agent request {method} failed: {e}")
+            return {'ok': False, 'error': str(e)}
+
+
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one JSON request per client connection."""
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {'ok': False, 'error': f"Invalid request: {e}"}
+        else:
+            response = self.server.dispatch(request)
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+def run_agent(config: Dict[str, Any]) -> None:
+    """Hold an RTX830 connection and serve it until idle.
+
+    Args:
+        config: Connection configuration dictionary
+    """
+    path = socket_path(config)
+    _ensure_socket_dir(path)
+    connection = RTXConnection(config)
+    connection.connect()
+
+    # Socket must only be accessible by the current user
+    os.umask(0o077)
+    path.unlink(missing_ok=True)
+    server = _AgentServer(path, connection, config.get('agent_idle_timeout', 300))
+    logger.info(f"Agent listening on: {path}")
+
+    try:
+        while not server.idle:
+            server.handle_request()
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+        connection.disconnect()
+        logger.info("Agent stopped")
+
+
+def main() -> None:
+    """Agent entry point, reads connection configuration from stdin."""
+    config = json.load(sys.stdin)
+    try:
+        run_agent(config)
+    except RTXConnectionError as e:
+        logger.error(f"Agent failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
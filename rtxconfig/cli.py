@@ -1,23 +1,62 @@
 """Command line interface for RTX config management."""
 
+import os
 import sys
 import logging
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import click
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.columns import Columns
 
 from .config import ConfigManager as ConfigFileManager, RTXConfig
 from .connection import create_connection, RTXConnectionError
-from .manager import ConfigManager
+from .manager import ConfigManager, DIFF_ALGORITHMS
 
-console = Console()
+
+# Commands that never connect to the RTX830
+NO_DEVICE_COMMANDS = {'backups', 'validate'}
+
+
+@lru_cache(maxsize=None)
+def _console():
+    """Get shared Rich console, importing Rich on first use."""
+    from rich.console import Console
+    return Console()
+
+
+@contextmanager
+def _spinner(ctx, description: str):
+    """Show a spinner while the block runs.
+    
+    Nested spinners share one Progress display, which is stopped when
+    its last spinner finishes so later output is not drawn under it.
+    
+    Yields:
+        Function to update the spinner description
+    """
+    progress = ctx.obj.get('_progress')
+    if progress is None:
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+        
+        progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=_console()
+        )
+        progress.start()
+        ctx.obj['_progress'] = progress
+    
+    task = progress.add_task(description, total=None)
+    try:
+        yield lambda text: progress.update(task, description=text)
+    finally:
+        progress.remove_task(task)
+        if not progress.tasks:
+            progress.stop()
+            ctx.obj.pop('_progress', None)
 
 
 def setup_logging(level: str = "INFO", log_file: Optional[str] = None):
@@ -62,7 +101,12 @@ def main(ctx, config: Optional[Path], verbose: bool):
     # Load configuration for other commands
     try:
         config_manager = ConfigFileManager(str(config) if config else None)
-        rtx_config = config_manager.load_config()
+        if ctx.invoked_subcommand in NO_DEVICE_COMMANDS:
+            # Connection settings are not needed, skip validating them
+            rtx_config = config_manager.load_local_config()
+        else:
+            rtx_config = config_manager.load_config()
+            ctx.obj['conn_params'] = rtx_config.rtx_connection.model_dump()
         ctx.obj['config'] = rtx_config
         ctx.obj['config_manager'] = config_manager
         
@@ -71,6 +115,7 @@ def main(ctx, config: Optional[Path], verbose: bool):
         setup_logging(log_level, rtx_config.logging.file)
         
     except Exception as e:
+        console = _console()
         console.print(f"[red]Error loading configuration: {e}[/red]")
         if verbose:
             console.print_exception()
@@ -81,18 +126,13 @@ def main(ctx, config: Optional[Path], verbose: bool):
 @click.pass_context
 def connect(ctx):
     """Test connection to RTX830."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            task = progress.add_task("Connecting to RTX830...", total=None)
-            
-            with create_connection(config.rtx_connection.model_dump()) as conn:
-                progress.update(task, description="Connected! Testing command execution...")
+        with _spinner(ctx, "Connecting to RTX830...") as update:
+            with create_connection(ctx.obj['conn_params']) as conn:
+                update("Connected! Testing command execution...")
                 hostname = conn.execute_command("show environment")
                 
         console.print("[green]✓ Connection successful![/green]")
@@ -112,18 +152,28 @@ def connect(ctx):
 @click.pass_context
 def backup(ctx, output: Optional[Path]):
     """Create backup of current RTX830 configuration."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     
     try:
-        with create_connection(config.rtx_connection.model_dump()) as conn:
+        with create_connection(ctx.obj['conn_params']) as conn:
             config_mgr = ConfigManager(config)
             
             if output:
                 # Save to specified file
-                config_data = conn.get_running_config()
                 output.parent.mkdir(parents=True, exist_ok=True)
-                with open(output, 'w', encoding='utf-8') as f:
-                    f.write(config_data)
+                # Stream into a temporary file so a failed transfer does not
+                # leave a truncated file in place of an existing one
+                fd, tmp_name = tempfile.mkstemp(
+                    dir=output.parent, prefix=f".{output.name}.", suffix=".tmp"
+                )
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        conn.stream_running_config(f)
+                    os.replace(tmp_name, output)
+                except BaseException:
+                    os.unlink(tmp_name)
+                    raise
                 console.print(f"[green]✓ Configuration saved to: {output}[/green]")
             else:
                 # Create timestamped backup
@@ -147,9 +197,15 @@ def backup(ctx, output: Optional[Path]):
     is_flag=True,
     help="Show what would be applied without making changes"
 )
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Apply even if the file matches the last known running configuration"
+)
 @click.pass_context
-def apply(ctx, config_file: Path, no_backup: bool, dry_run: bool):
+def apply(ctx, config_file: Path, no_backup: bool, dry_run: bool, force: bool):
     """Apply configuration file to RTX830."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     
     try:
@@ -160,23 +216,20 @@ def apply(ctx, config_file: Path, no_backup: bool, dry_run: bool):
         
         if not validation['valid']:
             console.print("[red]✗ Configuration file validation failed:[/red]")
-            for error in validation['errors']:
-                console.print(f"  • {error}")
+            console.print("\n".join(f"  • {error}" for error in validation['errors']), highlight=False)
             sys.exit(1)
         
         if validation['warnings']:
             console.print("[yellow]⚠ Configuration file warnings:[/yellow]")
-            for warning in validation['warnings']:
-                console.print(f"  • {warning}")
+            console.print("\n".join(f"  • {warning}" for warning in validation['warnings']), highlight=False)
         
         console.print(f"Found {validation['command_count']} configuration commands")
         
         if dry_run:
-            # Show what would be applied
-            with open(config_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            from rich.syntax import Syntax
             
-            syntax = Syntax(content, "text", theme="monokai", line_numbers=True)
+            # Show what would be applied
+            syntax = Syntax(validation['content'], "text", theme="monokai", line_numbers=True)
             console.print("\n[bold]Configuration to be applied:[/bold]")
             console.print(syntax)
             return
@@ -186,12 +239,14 @@ def apply(ctx, config_file: Path, no_backup: bool, dry_run: bool):
             console.print("Operation cancelled")
             return
         
-        with create_connection(config.rtx_connection.model_dump()) as conn:
+        with create_connection(ctx.obj['conn_params']) as conn:
             results = config_mgr.apply_config(
-                conn, config_file, create_backup=not no_backup
+                conn, config_file, create_backup=not no_backup, force=force
             )
             
-            if results['applied']:
+            if results['skipped']:
+                console.print("[green]✓ Configuration already matches running config, nothing to apply[/green]")
+            elif results['applied']:
                 console.print("[green]✓ Configuration applied successfully![/green]")
                 if results['backup_file']:
                     console.print(f"Backup created: {results['backup_file']}")
@@ -206,17 +261,38 @@ def apply(ctx, config_file: Path, no_backup: bool, dry_run: bool):
 
 @main.command()
 @click.argument("config_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--algo",
+    type=click.Choice(DIFF_ALGORITHMS),
+    default='histogram',
+    help="Diff algorithm"
+)
+@click.option(
+    "--context", "-U",
+    type=click.IntRange(min=0),
+    default=3,
+    help="Number of context lines"
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Fetch the running configuration even if the file matches the last known one"
+)
 @click.pass_context
-def diff(ctx, config_file: Path):
+def diff(ctx, config_file: Path, algo: str, context: int, force: bool):
     """Show difference between current configuration and file."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     
     try:
-        with create_connection(config.rtx_connection.model_dump()) as conn:
+        with create_connection(ctx.obj['conn_params']) as conn:
             config_mgr = ConfigManager(config)
-            diff_output = config_mgr.get_config_diff(conn, config_file)
+            diff_output = config_mgr.get_config_diff(
+                conn, config_file, algorithm=algo, context=context, force=force
+            )
             
             if diff_output.strip():
+                from rich.syntax import Syntax
                 syntax = Syntax(diff_output, "diff", theme="monokai")
                 console.print(syntax)
             else:
@@ -232,6 +308,7 @@ def diff(ctx, config_file: Path):
 @click.pass_context
 def restore(ctx, backup_file: Path):
     """Restore configuration from backup file."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     
     if not click.confirm(f"Restore configuration from {backup_file}?"):
@@ -239,7 +316,7 @@ def restore(ctx, backup_file: Path):
         return
     
     try:
-        with create_connection(config.rtx_connection.model_dump()) as conn:
+        with create_connection(ctx.obj['conn_params']) as conn:
             config_mgr = ConfigManager(config)
             
             if config_mgr.restore_from_backup(conn, backup_file):
@@ -259,9 +336,15 @@ def restore(ctx, backup_file: Path):
     is_flag=True,
     help="Remove old backup files based on retention policy"
 )
+@click.option(
+    "--limit", "-n",
+    type=click.IntRange(min=1),
+    help="Show only the newest N backup files"
+)
 @click.pass_context
-def backups(ctx, cleanup: bool):
+def backups(ctx, cleanup: bool, limit: Optional[int]):
     """List backup files."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     config_mgr = ConfigManager(config)
     
@@ -270,12 +353,14 @@ def backups(ctx, cleanup: bool):
         console.print(f"[green]Removed {removed_count} old backup files[/green]")
         return
     
-    backup_list = config_mgr.list_backups()
+    backup_list = config_mgr.list_backups(limit)
     
     if not backup_list:
         console.print("No backup files found")
         return
     
+    from rich.table import Table
+    
     table = Table(title="RTX830 Configuration Backups")
     table.add_column("File", style="cyan")
     table.add_column("Size", justify="right")
@@ -298,6 +383,7 @@ def backups(ctx, cleanup: bool):
 @click.argument("output_file", type=click.Path(path_type=Path))
 def init_config(output_file: Path):
     """Create example configuration file."""
+    console = _console()
     try:
         # Create config manager without loading existing config
         config_manager = ConfigFileManager()
@@ -319,6 +405,7 @@ def init_config(output_file: Path):
 @click.pass_context
 def validate(ctx, config_file: Path):
     """Validate configuration file syntax."""
+    console = _console()
     config: RTXConfig = ctx.obj['config']
     config_mgr = ConfigManager(config)
     
@@ -329,13 +416,11 @@ def validate(ctx, config_file: Path):
         console.print(f"Found {validation['command_count']} commands")
     else:
         console.print(f"[red]✗ Configuration file is invalid[/red]")
-        for error in validation['errors']:
-            console.print(f"  • {error}")
+        console.print("\n".join(f"  • {error}" for error in validation['errors']), highlight=False)
     
     if validation['warnings']:
         console.print(f"[yellow]⚠ Warnings:[/yellow]")
-        for warning in validation['warnings']:
-            console.print(f"  • {warning}")
+        console.print("\n".join(f"  • {warning}" for warning in validation['warnings']), highlight=False)
 
 
 @main.command()
@@ -348,16 +433,11 @@ def validate(ctx, config_file: Path):
 @click.pass_context
 def status(ctx, format: str):
     """Show RTX830 status information."""
-    config: RTXConfig = ctx.obj['config']
+    console = _console()
 
     try:
-        with create_connection(config.rtx_connection.model_dump()) as conn:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console
-            ) as progress:
-                task = progress.add_task("Gathering status information...", total=None)
+        with create_connection(ctx.obj['conn_params']) as conn:
+            with _spinner(ctx, "Gathering status information..."):
                 status_info = conn.get_status_info()
             
             logging.info(status_info)
@@ -1,6 +1,10 @@
 """Configuration management for RTX config tool."""
 
 import os
+import re
+import json
+import hashlib
+import tempfile
 from pathlib import Path
 from typing import Dict, Any, Optional
 import logging
@@ -8,8 +12,73 @@ import logging
 from pydantic import BaseModel, Field, validator
 from ruamel.yaml import YAML
 
+try:
+    import yaml
+    from yaml import CSafeLoader, CSafeDumper
+except ImportError:  # PyYAML missing or built without libyaml
+    CSafeLoader = CSafeDumper = None
+
 logger = logging.getLogger(__name__)
 
+# Bump when cached configurations may differ from a fresh load
+_CACHE_FORMAT = 2
+
+
+def _construct_yaml12_int(loader, node) -> int:
+    """Construct int like YAML 1.2: leading zeros are decimal, octal needs '0o'."""
+    value = loader.construct_scalar(node).replace('_', '')
+    sign = -1 if value[0] == '-' else 1
+    if value[0] in '+-':
+        value = value[1:]
+    for prefix, base in (('0b', 2), ('0o', 8), ('0x', 16)):
+        if value.startswith(prefix):
+            return sign * int(value[2:], base)
+    return sign * int(value)
+
+
+if CSafeLoader is not None:
+    class _ConfigLoader(CSafeLoader):
+        """libyaml loader resolving plain scalars like ruamel's YAML 1.2 loader.
+        
+        PyYAML follows YAML 1.1, where e.g. 'no' and 'off' are booleans,
+        '0123' is octal and '12:30' is a sexagesimal int.
+        """
+    
+    _YAML11_TAGS = {
+        'tag:yaml.org,2002:bool',
+        'tag:yaml.org,2002:int',
+        'tag:yaml.org,2002:float',
+        'tag:yaml.org,2002:value',
+    }
+    _ConfigLoader.yaml_implicit_resolvers = {
+        first: [(tag, regexp) for tag, regexp in resolvers if tag not in _YAML11_TAGS]
+        for first, resolvers in CSafeLoader.yaml_implicit_resolvers.items()
+    }
+    # Same expressions as ruamel.yaml's YAML 1.2 resolver
+    _ConfigLoader.add_implicit_resolver(
+        'tag:yaml.org,2002:bool',
+        re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"),
+        list('tTfF'))
+    _ConfigLoader.add_implicit_resolver(
+        'tag:yaml.org,2002:float',
+        re.compile(r"""^(?:
+         [-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+        |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+        |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""", re.X),
+        list('-+0123456789.'))
+    _ConfigLoader.add_implicit_resolver(
+        'tag:yaml.org,2002:int',
+        re.compile(r"""^(?:[-+]?0b[0-1_]+
+        |[-+]?0o?[0-7_]+
+        |[-+]?[0-9_]+
+        |[-+]?0x[0-9a-fA-F_]+)$""", re.X),
+        list('-+0123456789'))
+    _ConfigLoader.add_constructor('tag:yaml.org,2002:int', _construct_yaml12_int)
+else:
+    _ConfigLoader = None
+
 
 class RTXConnectionConfig(BaseModel):
     """RTX830 connection configuration."""
@@ -23,6 +92,9 @@ class RTXConnectionConfig(BaseModel):
     conn_timeout: int = Field(10, description="Connection timeout in seconds")
     secret: Optional[str] = Field(None, description="Enable password for privileged mode")
     session_log: Optional[str] = Field(None, description="Path to session log file")
+    config_cmd_verify: bool = Field(False, description="Wait for prompt after each configuration command")
+    use_agent: bool = Field(False, description="Reuse SSH session through a local agent process")
+    agent_idle_timeout: int = Field(300, description="Agent idle timeout in seconds")
     
     @validator('key_file')
     def validate_key_file(cls, v):
@@ -44,6 +116,7 @@ class BackupConfig(BaseModel):
     """Backup configuration."""
     directory: str = Field("./backups", description="Backup directory path")
     keep_days: int = Field(30, description="Number of days to keep backups")
+    compression: str = Field("none", description="Backup compression ('none' or 'zstd')")
     
     @validator('keep_days')
     def validate_keep_days(cls, v):
@@ -51,6 +124,14 @@ class BackupConfig(BaseModel):
         if v <= 0:
             raise ValueError("keep_days must be positive")
         return v
+    
+    @validator('compression')
+    def validate_compression(cls, v):
+        """Validate compression value."""
+        valid_compressions = ['none', 'zstd']
+        if v.lower() not in valid_compressions:
+            raise ValueError(f"Compression must be one of: {valid_compressions}")
+        return v.lower()
 
 
 class LoggingConfig(BaseModel):
@@ -78,6 +159,12 @@ class RTXConfig(BaseModel):
         extra = "forbid"
 
 
+def _cache_dir() -> Path:
+    """Get directory for cached validated configurations."""
+    base = os.environ.get('XDG_CACHE_HOME') or '~/.cache'
+    return Path(base).expanduser() / 'rtxconfig'
+
+
 class ConfigManager:
     """Configuration file manager."""
     
@@ -140,13 +227,15 @@ class ConfigManager:
             raise FileNotFoundError("No configuration file specified or found")
         
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                data = self.yaml.load(f)
-            
-            if not data:
-                raise ValueError("Configuration file is empty")
+            cached = self._load_cached_config()
+            if cached is not None:
+                self.config = cached
+                logger.info(f"Configuration loaded from cache: {self.config_file}")
+                return self.config
             
+            data = self._load_raw()
             self.config = RTXConfig(**data)
+            self._store_cached_config(self.config)
             logger.info(f"Configuration loaded from: {self.config_file}")
             return self.config
             
@@ -155,6 +244,126 @@ class ConfigManager:
         except Exception as e:
             raise ValueError(f"Invalid configuration file: {e}")
     
+    def load_local_config(self) -> RTXConfig:
+        """Load configuration needed by commands without device access.
+        
+        Only the backup and logging sections are validated;
+        rtx_connection is left unset.
+        
+        Returns:
+            Partially loaded configuration
+            
+        Raises:
+            FileNotFoundError: If config file not found
+            ValueError: If config file is invalid
+        """
+        if not self.config_file:
+            raise FileNotFoundError("No configuration file specified or found")
+        
+        try:
+            cached = self._load_cached_config()
+            if cached is not None:
+                self.config = cached
+                logger.info(f"Configuration loaded from cache: {self.config_file}")
+                return self.config
+            
+            data = self._load_raw()
+            self.config = RTXConfig.model_construct(
+                rtx_connection=None,
+                backup=BackupConfig(**(data.get('backup') or {})),
+                logging=LoggingConfig(**(data.get('logging') or {})),
+            )
+            logger.info(f"Local configuration loaded from: {self.config_file}")
+            return self.config
+            
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found: {self.config_file}")
+        except Exception as e:
+            raise ValueError(f"Invalid configuration file: {e}")
+    
+    def _load_raw(self) -> Dict[str, Any]:
+        """Read configuration file without validating it.
+        
+        Returns:
+            Raw configuration data
+        """
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            # libyaml is much faster; ruamel is only needed for writing
+            if _ConfigLoader is not None:
+                data = yaml.load(f, Loader=_ConfigLoader)
+            else:
+                data = self.yaml.load(f)
+        
+        if not data:
+            raise ValueError("Configuration file is empty")
+        
+        return data
+    
+    def _cache_paths(self) -> tuple:
+        """Get cache file path and cache key for the current config file.
+        
+        Returns:
+            Tuple of (cache file path, key derived from file mtime and size)
+        """
+        path_hash = hashlib.sha256(str(self.config_file.resolve()).encode('utf-8')).hexdigest()
+        st = self.config_file.stat()
+        return _cache_dir() / f"{path_hash}.json", f"{_CACHE_FORMAT}-{st.st_mtime_ns}-{st.st_size}"
+    
+    def _load_cached_config(self) -> Optional[RTXConfig]:
+        """Load previously validated configuration from cache.
+        
+        Returns:
+            Cached configuration, or None if missing or stale
+        """
+        try:
+            cache_file, key = self._cache_paths()
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            cached_key, data = cached['key'], cached['config']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable config cache: {e}")
+            return None
+        
+        if cached_key != key:
+            return None
+        
+        # Data was validated before caching, so skip validation
+        try:
+            return RTXConfig.model_construct(
+                rtx_connection=RTXConnectionConfig.model_construct(**data['rtx_connection']),
+                backup=BackupConfig.model_construct(**data['backup']),
+                logging=LoggingConfig.model_construct(**data['logging']),
+            )
+        except Exception as e:
+            logger.debug(f"Ignoring invalid config cache: {e}")
+            return None
+    
+    def _store_cached_config(self, config: RTXConfig) -> None:
+        """Store validated configuration in cache.
+        
+        Args:
+            config: Validated configuration
+        """
+        try:
+            cache_file, key = self._cache_paths()
+            # Cached data includes the enable password, keep it private
+            cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            os.chmod(cache_file.parent, 0o700)
+            
+            # Write atomically so concurrent invocations never see partial files
+            fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'key': key, 'config': config.model_dump()}, f)
+                os.replace(tmp_name, cache_file)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        except Exception as e:
+            logger.debug(f"Failed to write config cache: {e}")
+    
     def save_config(self, config: RTXConfig, file_path: Optional[str] = None) -> None:
         """Save configuration to file.
         
@@ -162,23 +371,67 @@ class ConfigManager:
             config: Configuration to save
             file_path: Target file path. If None, uses current config file.
         """
-        target_file = Path(file_path).expanduser() if file_path else self.config_file
+        target_file = self._prepare_target_file(file_path)
         
-        if not target_file:
-            raise ValueError("No target file specified")
+        try:
+            with open(target_file, 'w', encoding='utf-8') as f:
+                self.yaml.dump(config.model_dump(), f)
+            
+            logger.info(f"Configuration saved to: {target_file}")
+            
+        except Exception as e:
+            raise ValueError(f"Failed to save configuration: {e}")
+    
+    def save_config_fast(self, config: RTXConfig, file_path: Optional[str] = None) -> None:
+        """Save configuration to file without preserving formatting.
         
-        # Ensure parent directory exists
-        target_file.parent.mkdir(parents=True, exist_ok=True)
+        Uses libyaml's emitter, writing directly to the file. Falls back to
+        save_config() if libyaml is unavailable.
+        
+        Args:
+            config: Configuration to save
+            file_path: Target file path. If None, uses current config file.
+        """
+        if CSafeDumper is None:
+            self.save_config(config, file_path)
+            return
+        
+        target_file = self._prepare_target_file(file_path)
         
         try:
             with open(target_file, 'w', encoding='utf-8') as f:
-                self.yaml.dump(config.model_dump(), f)
+                yaml.dump(
+                    config.model_dump(), f,
+                    Dumper=CSafeDumper,
+                    default_flow_style=False,
+                    sort_keys=False,
+                    allow_unicode=True
+                )
             
             logger.info(f"Configuration saved to: {target_file}")
             
         except Exception as e:
             raise ValueError(f"Failed to save configuration: {e}")
     
+    def _prepare_target_file(self, file_path: Optional[str]) -> Path:
+        """Resolve target file for saving and create its parent directory.
+        
+        Args:
+            file_path: Target file path. If None, uses current config file.
+            
+        Returns:
+            Target file path
+        """
+        target_file = Path(file_path).expanduser() if file_path else self.config_file
+        
+        if not target_file:
+            raise ValueError("No target file specified")
+        
+        # Ensure parent directory exists
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        return target_file
+    
     def create_example_config(self, file_path: str) -> None:
         """Create example configuration file.
         
@@ -193,7 +446,7 @@ class ConfigManager:
             )
         )
         
-        self.save_config(example_config, file_path)
+        self.save_config_fast(example_config, file_path)
         logger.info(f"Example configuration created at: {file_path}")
     
     def get_config(self) -> RTXConfig:
@@ -1,16 +1,57 @@
 """RTX830 SSH connection management."""
 
 import os
+import re
+import socket
 import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO
 import logging
 
-from netmiko import ConnectHandler
-from netmiko.exceptions import NetmikoBaseException, NetmikoTimeoutException, NetmikoAuthenticationException
-
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent SSH sessions used by get_status_info
+STATUS_SESSIONS = 4
+
+# Seconds the channel must stay quiet after a prompt before streamed
+# output is considered complete
+PROMPT_IDLE_SECONDS = 0.2
+
+# Netmiko's yamaha driver only expects '>', but RTX prompts end in '#'
+# in administrator mode
+_PROMPT_PATTERN_MAP = {'>': '(?:>|#)', '>.*': '(?:>.*$|#.*$)'}
+
+
+def _patch_netmiko_prompt() -> None:
+    """Make netmiko's prompt detection accept administrator mode prompts.
+    
+    Applied on first connect so importing rtxconfig does not load netmiko.
+    """
+    import netmiko
+    
+    if getattr(netmiko, "_MY_PATCH_APPLIED", False):
+        return
+    
+    original = netmiko.BaseConnection.read_until_pattern
+    
+    def read_until_pattern(self, *args, **kwargs):
+        pattern = _PROMPT_PATTERN_MAP.get(kwargs.get('pattern'))
+        if pattern is not None:
+            kwargs['pattern'] = pattern
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("read_until_pattern start with args: %s, kwargs: %s", args, kwargs)
+        result = original(self, *args, **kwargs)
+        if debug:
+            logger.debug("read_until_pattern finish with result: %s", result)
+        return result
+    
+    netmiko.BaseConnection.read_until_pattern = read_until_pattern
+    netmiko._MY_PATCH_APPLIED = True
+    logger.debug("Patched netmiko read_until_pattern for RTX prompts")
+
 
 class RTXConnectionError(Exception):
     """Custom exception for RTX connection errors."""
@@ -20,6 +61,10 @@ class RTXConnectionError(Exception):
 class RTXConnection:
     """Manages SSH connections to RTX830 devices."""
     
+    # End of the RTX prompt: '>' in normal mode, '#' in administrator mode.
+    # \Z rather than $, which also matches before a trailing newline
+    _PROMPT_RE = re.compile(r"[>#] ?\Z")
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize connection with configuration.
         
@@ -28,6 +73,7 @@ class RTXConnection:
         """
         self.config = config
         self.connection = None
+        self._prompt_pattern: Optional[str] = None
         
         # Validate SSH key file
         self._validate_key_file()
@@ -54,6 +100,13 @@ class RTXConnection:
         if self.connection and self.connection.is_alive():
             return
         
+        # Imported lazily, netmiko is slow to import
+        from netmiko import ConnectHandler
+        from netmiko.exceptions import (
+            NetmikoBaseException, NetmikoTimeoutException, NetmikoAuthenticationException
+        )
+        _patch_netmiko_prompt()
+        
         connection_params = {
             'device_type': 'yamaha',
             'host': self.config['host'],
@@ -72,6 +125,16 @@ class RTXConnection:
         try:
             logger.info(f"Connecting to RTX830 at {self.config['host']}...")
             self.connection = ConnectHandler(**connection_params)
+            
+            # The yamaha prompt is deterministic once the base prompt is known,
+            # so commands can wait for it directly instead of calling
+            # find_prompt() each time. Per-command echo checks could also be
+            # skipped with global_cmd_verify=False.
+            # The base prompt is often empty, so the prompt must also start
+            # a line or any output line ending in '>' or '#' would match
+            self._prompt_pattern = (
+                r"(?:^|[\r\n])" + re.escape(self.connection.base_prompt) + self._PROMPT_RE.pattern
+            )
             logger.info("Successfully connected to RTX830")
             
         except NetmikoAuthenticationException as e:
@@ -104,6 +167,7 @@ class RTXConnection:
         Args:
             command: Command to execute
             expect_string: Expected prompt after command execution
+                (defaults to the RTX prompt)
             
         Returns:
             Command output
@@ -114,11 +178,15 @@ class RTXConnection:
         if not self.is_connected():
             raise RTXConnectionError("Not connected to RTX830")
         
+        from netmiko.exceptions import NetmikoBaseException
+        
         try:
             logger.debug(f"Executing command: {command}")
             output = self.connection.send_command(
                 command,
-                expect_string=expect_string,
+                expect_string=expect_string or self._prompt_pattern,
+                read_timeout=self.config.get('timeout', 30),
+                auto_find_prompt=False,
                 strip_prompt=True,
                 strip_command=True
             )
@@ -140,11 +208,20 @@ class RTXConnection:
         if not self.is_connected():
             raise RTXConnectionError("Not connected to RTX830")
 
+        from netmiko.exceptions import NetmikoBaseException
+
         try:
             logger.info(f"Sending {len(commands)} configuration commands")
+            # Without cmd_verify, commands are written back to back and output
+            # is read once at the end instead of after every line
             output = self.connection.send_config_set(
                 config_commands=commands,
-                read_timeout=30
+                enter_config_mode=True,
+                exit_config_mode=True,
+                cmd_verify=self.config.get('config_cmd_verify', False),
+                read_timeout=60,
+                strip_prompt=False,
+                strip_command=False
             )
             logger.info("Configuration commands sent successfully")
             return output
@@ -152,6 +229,96 @@ class RTXConnection:
         except NetmikoBaseException as e:
             raise RTXConnectionError(f"Configuration failed: {e}")
     
+    def stream_command(self, command: str, fh: BinaryIO, chunk_size: int = 65536) -> int:
+        """Execute command on RTX830 and write its output to a file.
+        
+        Output is copied from the SSH channel to fh as it arrives instead
+        of being collected into a string first.
+        
+        Args:
+            command: Command to execute
+            fh: Binary file object to write output to
+            chunk_size: Maximum number of bytes read from the channel at once
+            
+        Returns:
+            Number of bytes written
+            
+        Raises:
+            RTXConnectionError: If not connected or reading output fails
+        """
+        if not self.is_connected():
+            raise RTXConnectionError("Not connected to RTX830")
+        
+        conn = self.connection
+        channel = conn.remote_conn
+        prompt_re = re.compile(re.escape(conn.base_prompt.encode()) + rb"[>#] ?")
+        
+        logger.debug(f"Streaming command: {command}")
+        conn.clear_buffer()
+        conn.write_channel(conn.normalize_cmd(command))
+        
+        previous_timeout = channel.gettimeout()
+        channel.settimeout(self.config.get('timeout', 30))
+        
+        pending = b""
+        echo_skipped = False
+        written = 0
+        try:
+            while True:
+                data = channel.recv(chunk_size)
+                if not data:
+                    raise RTXConnectionError("Connection closed while reading command output")
+                pending = (pending + data).replace(b"\r\n", b"\n")
+                
+                if not echo_skipped:
+                    # Drop the echoed command line, the text before the
+                    # command is the full prompt that ends the output
+                    newline = pending.find(b"\n")
+                    if newline < 0:
+                        continue
+                    echo = pending[:newline]
+                    prompt = echo[:max(echo.rfind(command.encode()), 0)].strip()
+                    if prompt:
+                        prompt_re = re.compile(re.escape(prompt) + rb" ?")
+                    pending = pending[newline + 1:]
+                    echo_skipped = True
+                
+                # Write complete lines, keep the last partial line since it may be the prompt
+                end = pending.rfind(b"\n") + 1
+                if end:
+                    fh.write(pending[:end])
+                    written += end
+                    pending = pending[end:]
+                
+                # pending starts at a line start, and a config line can look
+                # like the prompt at a chunk boundary, so also require that
+                # nothing more arrives
+                if prompt_re.fullmatch(pending) and self._channel_idle(channel):
+                    logger.debug(f"Command output length: {written} bytes")
+                    return written
+        except socket.timeout:
+            raise RTXConnectionError(f"Timed out reading output of: {command}")
+        finally:
+            channel.settimeout(previous_timeout)
+    
+    @staticmethod
+    def _channel_idle(channel, wait: float = PROMPT_IDLE_SECONDS) -> bool:
+        """Check that no data arrives on the channel for a short time.
+        
+        Args:
+            channel: Paramiko channel
+            wait: Seconds to wait for data
+            
+        Returns:
+            True if the channel stayed idle
+        """
+        deadline = time.monotonic() + wait
+        while not channel.recv_ready():
+            if time.monotonic() >= deadline:
+                return True
+            time.sleep(0.01)
+        return False
+    
     def get_running_config(self) -> str:
         """Get current running configuration.
         
@@ -160,6 +327,17 @@ class RTXConnection:
         """
         return self.execute_command("show config")
     
+    def stream_running_config(self, fh: BinaryIO) -> int:
+        """Write current running configuration to a file.
+        
+        Args:
+            fh: Binary file object to write configuration to
+            
+        Returns:
+            Number of bytes written
+        """
+        return self.stream_command("show config", fh)
+    
     def save_config(self) -> str:
         """Save current configuration to flash.
         
@@ -168,9 +346,15 @@ class RTXConnection:
         """
         return self.connection.save_config()
 
-    def get_status_info(self) -> Dict[str, str]:
+    def get_status_info(self, max_sessions: int = STATUS_SESSIONS) -> Dict[str, str]:
         """Get various status information from RTX830.
         
+        Commands are spread over up to max_sessions SSH sessions (this one
+        plus additional ones) and run concurrently.
+        
+        Args:
+            max_sessions: Maximum number of concurrent SSH sessions
+            
         Returns:
             Dictionary containing status information
         """
@@ -188,9 +372,46 @@ class RTXConnection:
             'ipv6_route': 'show ipv6 route',
             'dhcp': 'show status dhcp summary',
         }
-
+        
+        keys = list(status_commands)
+        sessions = max(1, min(max_sessions, len(keys)))
+        shares = [
+            {key: status_commands[key] for key in keys[i::sessions]}
+            for i in range(sessions)
+        ]
+        
+        status_info = {}
+        pending = {}
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            futures = [
+                (share, executor.submit(self._collect_status_in_session, share))
+                for share in shares[1:]
+            ]
+            status_info.update(self._collect_status(shares[0]))
+            
+            for share, future in futures:
+                result = future.result()
+                if result is None:
+                    pending.update(share)
+                else:
+                    status_info.update(result)
+        
+        # Commands whose session could not be opened run on this connection
+        status_info.update(self._collect_status(pending))
+        
+        return {key: status_info[key] for key in keys}
+    
+    def _collect_status(self, commands: Dict[str, str]) -> Dict[str, str]:
+        """Execute status commands sequentially on this connection.
+        
+        Args:
+            commands: Mapping of status key to command
+            
+        Returns:
+            Mapping of status key to command output
+        """
         status_info = {}
-        for key, command in status_commands.items():
+        for key, command in commands.items():
             try:
                 output = self.execute_command(command)
                 status_info[key] = output
@@ -198,6 +419,31 @@ class RTXConnection:
                 status_info[key] = f"Error: {e}"
                 logger.warning(f"Failed to get {key}: {e}")
         return status_info
+    
+    def _collect_status_in_session(self, commands: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Execute status commands over an additional SSH session.
+        
+        Netmiko connections are not thread-safe, so each worker uses its own.
+        
+        Args:
+            commands: Mapping of status key to command
+            
+        Returns:
+            Mapping of status key to command output, or None if the session
+            could not be opened
+        """
+        try:
+            # Only the primary session writes the session log
+            session = type(self)({**self.config, 'session_log': None})
+            session.connect()
+        except RTXConnectionError as e:
+            logger.warning(f"Failed to open additional session: {e}")
+            return None
+        
+        try:
+            return session._collect_status(commands)
+        finally:
+            session.disconnect()
 
     def __enter__(self):
         """Context manager entry."""
@@ -212,10 +458,22 @@ class RTXConnection:
 def create_connection(config: Dict[str, Any]) -> RTXConnection:
     """Factory function to create RTX connection.
     
+    If use_agent is enabled, the connection is proxied through a local
+    agent process holding the SSH session, falling back to a direct
+    connection if the agent cannot be reached.
+    
     Args:
         config: Connection configuration
         
     Returns:
-        RTXConnection instance
+        RTXConnection instance (or AgentConnection when using the agent)
     """
+    if config.get('use_agent'):
+        from .agent import connect_agent
+        
+        agent = connect_agent(config)
+        if agent is not None:
+            return agent
+        logger.warning("Agent unavailable, connecting directly")
+    
     return RTXConnection(config)
\ No newline at end of file
@@ -0,0 +1,330 @@
+"""Histogram diff for RTX830 configuration files."""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Lines occurring more often than this are not used as anchors
+MAX_CHAIN_LENGTH = 64
+
+# Work (lines scanned and compared) allowed per input line; regions still
+# unmatched when it is used up are reported as replaced
+WORK_PER_LINE = 32
+MIN_WORK = 1 << 16
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+class _BudgetExceeded(Exception):
+    """Raised when the diff has used up its work budget."""
+
+
+def _find_anchor(a: Sequence[str], b: Sequence[str], alo: int, ahi: int,
+                 blo: int, bhi: int, budget: int) -> Tuple[Optional[Tuple[int, int, int]], bool, int]:
+    """Find the longest common region anchored on the rarest shared line.
+
+    Args:
+        a: Old lines
+        b: New lines
+        alo, ahi: Region bounds in a
+        blo, bhi: Region bounds in b
+        budget: Amount of work allowed
+
+    Returns:
+        Tuple of (matching block or None, whether any common line exists,
+        amount of work done)
+
+    Raises:
+        _BudgetExceeded: If the work budget is used up
+    """
+    work = (ahi - alo) + (bhi - blo)
+    if work > budget:
+        raise _BudgetExceeded()
+
+    index: Dict[str, List[int]] = {}
+    for i in range(alo, ahi):
+        index.setdefault(a[i], []).append(i)
+
+    best = None
+    best_count = MAX_CHAIN_LENGTH + 1
+    best_len = 0
+    best_offset = 0
+    has_common = False
+    # Prefer anchors near the middle on ties to keep recursion balanced
+    middle = (alo + ahi) // 2
+
+    j = blo
+    while j < bhi:
+        positions = index.get(b[j])
+        next_j = j + 1
+        if positions is None:
+            j = next_j
+            continue
+
+        has_common = True
+        if len(positions) > best_count:
+            j = next_j
+            continue
+
+        for i in positions:
+            # Extend the match in both directions
+            start_a, start_b = i, j
+            while start_a > alo and start_b > blo and a[start_a - 1] == b[start_b - 1]:
+                start_a -= 1
+                start_b -= 1
+            end_a, end_b = i + 1, j + 1
+            while end_a < ahi and end_b < bhi and a[end_a] == b[end_b]:
+                end_a += 1
+                end_b += 1
+
+            count = min(len(index[a[k]]) for k in range(start_a, end_a))
+            length = end_a - start_a
+            work += 2 * length
+            if work > budget:
+                raise _BudgetExceeded()
+            offset = abs(start_a + length // 2 - middle)
+            if (count < best_count
+                    or (count == best_count and length > best_len)
+                    or (count == best_count and length == best_len and offset < best_offset)):
+                best = (start_a, start_b, length)
+                best_count = count
+                best_len = length
+                best_offset = offset
+
+            next_j = max(next_j, end_b)
+
+        j = next_j
+
+    return best, has_common, work
+
+
+def _myers_matching_blocks(a: Sequence[str], b: Sequence[str], alo: int, ahi: int,
+                           blo: int, bhi: int, budget: int) -> Tuple[List[Tuple[int, int, int]], int]:
+    """Match a region with Myers' algorithm.
+
+    Used for regions whose common lines are all too frequent to anchor on.
+    Runs in O((N + M) * D) for D differing lines and stops once the work
+    budget is used up.
+
+    Args:
+        a: Old lines
+        b: New lines
+        alo, ahi: Region bounds in a
+        blo, bhi: Region bounds in b
+        budget: Amount of work allowed
+
+    Returns:
+        Tuple of (matching blocks, amount of work done)
+
+    Raises:
+        _BudgetExceeded: If the work budget is used up
+    """
+    n = ahi - alo
+    m = bhi - blo
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    # Furthest reaching x per diagonal after each round, for backtracking
+    trace = []
+    work = 0
+
+    for d in range(n + m + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+                work += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            work += d + 1
+            if work > budget:
+                raise _BudgetExceeded()
+            trace.append(v[offset - d:offset + d + 1])
+            continue
+        break
+
+    # Walk back from the end, collecting the diagonal runs
+    blocks = []
+    x, y = n, m
+    for d in range(len(trace), 0, -1):
+        previous = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and previous[k - 1 + d - 1] < previous[k + 1 + d - 1]):
+            prev_k = k + 1
+            prev_x = previous[prev_k + d - 1]
+            mid_x, mid_y = prev_x, prev_x - prev_k + 1
+        else:
+            prev_k = k - 1
+            prev_x = previous[prev_k + d - 1]
+            mid_x, mid_y = prev_x + 1, prev_x - prev_k
+        if x > mid_x:
+            blocks.append((alo + mid_x, blo + mid_y, x - mid_x))
+        x, y = prev_x, prev_x - prev_k
+    if x:
+        blocks.append((alo, blo, x))
+
+    return blocks, work
+
+
+def get_matching_blocks(a: Sequence[str], b: Sequence[str]) -> List[Tuple[int, int, int]]:
+    """Compute matching blocks between two line sequences.
+
+    Work is bounded by a budget proportional to the input size. Once it
+    is used up, regions not yet matched are left unmatched and show up as
+    replaced, so pathological input (e.g. reordered lines that are mostly
+    duplicates) cannot make the diff quadratic.
+
+    Args:
+        a: Old lines
+        b: New lines
+
+    Returns:
+        Sorted list of (i, j, n) triples, terminated by (len(a), len(b), 0)
+        like difflib.SequenceMatcher.get_matching_blocks()
+    """
+    budget = max(MIN_WORK, WORK_PER_LINE * (len(a) + len(b)))
+    blocks = []
+    regions = [(0, len(a), 0, len(b))]
+
+    try:
+        while regions:
+            alo, ahi, blo, bhi = regions.pop()
+            if alo >= ahi or blo >= bhi:
+                continue
+
+            anchor, has_common, work = _find_anchor(a, b, alo, ahi, blo, bhi, budget)
+            budget -= work
+
+            if anchor is None:
+                if has_common:
+                    # Only very frequent lines in common
+                    region_blocks, work = _myers_matching_blocks(a, b, alo, ahi, blo, bhi, budget)
+                    budget -= work
+                    blocks.extend(region_blocks)
+                continue
+
+            i, j, n = anchor
+            blocks.append(anchor)
+            regions.append((i + n, ahi, j + n, bhi))
+            regions.append((alo, i, blo, j))
+    except _BudgetExceeded:
+        pass
+
+    blocks.sort()
+    blocks.append((len(a), len(b), 0))
+    return blocks
+
+
+def get_opcodes(a: Sequence[str], b: Sequence[str]) -> List[Opcode]:
+    """Compute edit opcodes between two line sequences.
+
+    Args:
+        a: Old lines
+        b: New lines
+
+    Returns:
+        List of opcodes in difflib.SequenceMatcher.get_opcodes() format
+    """
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in get_matching_blocks(a, b):
+        if i < ai and j < bj:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(('delete', i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(('insert', i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(('equal', ai, i, bj, j))
+    return opcodes
+
+
+def group_opcodes(opcodes: List[Opcode], n: int = 3) -> Iterator[List[Opcode]]:
+    """Group opcodes into hunks with up to n lines of context.
+
+    Args:
+        opcodes: Opcodes from get_opcodes()
+        n: Number of context lines
+
+    Yields:
+        Lists of opcodes, one per hunk
+    """
+    codes = list(opcodes)
+    if not codes:
+        codes = [('equal', 0, 1, 0, 1)]
+
+    # Trim leading and trailing context
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        # Split hunks on large unchanged ranges
+        if tag == 'equal' and i2 - i1 > n * 2:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Format a line range for a unified diff hunk header."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def format_unified(a: Sequence[str], b: Sequence[str], opcodes: List[Opcode],
+                   fromfile: str = '', tofile: str = '', n: int = 3,
+                   lineterm: str = '') -> Iterator[str]:
+    """Render opcodes as unified diff lines.
+
+    Args:
+        a: Old lines (without line endings)
+        b: New lines (without line endings)
+        opcodes: Opcodes describing the edit
+        fromfile: Label for the old file
+        tofile: Label for the new file
+        n: Number of context lines
+        lineterm: Line ending appended to every output line
+
+    Yields:
+        Unified diff lines
+    """
+    started = False
+    for group in group_opcodes(opcodes, n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@{lineterm}"
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield f" {line}{lineterm}"
+                continue
+            if tag in ('replace', 'delete'):
+                for line in a[i1:i2]:
+                    yield f"-{line}{lineterm}"
+            if tag in ('replace', 'insert'):
+                for line in b[j1:j2]:
+                    yield f"+{line}{lineterm}"
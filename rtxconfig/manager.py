@@ -1,22 +1,200 @@
 """RTX830 configuration management functionality."""
 
+import io
 import os
+import re
+import time
+import heapq
 import shutil
+import hashlib
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import difflib
 import logging
 
 from .connection import RTXConnection, RTXConnectionError
 from .config import RTXConfig
+from . import histogram_diff
+
+try:
+    import xxhash
+except ImportError:  # optional dependency
+    xxhash = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
+DIFF_ALGORITHMS = ('histogram', 'myers')
+
+ZSTD_LEVEL = 3
+
+# Commands that may wipe configuration or flash contents
+_DANGEROUS_PATTERNS = ('format', 'erase', 'delete flash')
+
+# All patterns in one alternation, matching any whitespace between words
+_DANGEROUS_COMMAND_RE = re.compile(
+    "|".join(r"\s+".join(map(re.escape, p.split())) for p in _DANGEROUS_PATTERNS).encode(),
+    re.IGNORECASE
+)
+
+# Non-empty, non-comment lines without leading whitespace; a greedy match
+# avoids backtracking at every line end. Bytes patterns only know ASCII
+# whitespace, so matches are stripped again with str.strip() after decoding
+_COMMAND_LINE_RE = re.compile(rb"(?m)^[ \t\r\f\v]*([^#\s][^\n]*)")
+
+
+def _fingerprint(data: bytes) -> str:
+    """Compute content fingerprint, using xxHash when available."""
+    if xxhash is not None:
+        return f"xxh3_128:{xxhash.xxh3_128(data).hexdigest()}"
+    return f"blake2b:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+
+
+def _read_bytes(path: Path) -> bytes:
+    """Read a whole file with unbuffered os.read calls.
+    
+    Args:
+        path: File to read
+        
+    Returns:
+        File contents
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        # os.read may return less than requested (very large or growing files)
+        if len(data) < size or size == 0:
+            chunks = [data]
+            while True:
+                chunk = os.read(fd, max(size - len(data), 65536))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b''.join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Write a whole file with unbuffered os.write calls.
+    
+    Args:
+        path: File to write, created or truncated
+        data: File contents
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        # os.write may write less than requested
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _iter_lines(data) -> Iterator[Tuple[int, bytes]]:
+    """Iterate over lines of a bytes-like buffer without splitting it up front.
+    
+    Args:
+        data: Buffer supporting find() and slicing
+        
+    Yields:
+        Tuples of (line number, line without newline)
+    """
+    size = len(data)
+    pos = 0
+    line_num = 0
+    while pos < size:
+        end = data.find(b'\n', pos)
+        if end < 0:
+            end = size
+        line_num += 1
+        yield line_num, data[pos:end]
+        pos = end + 1
+
+
+def _require_zstandard():
+    """Get zstandard module, raising if it is not installed."""
+    if zstandard is None:
+        raise RuntimeError("zstd compression requires the 'zstandard' package")
+    return zstandard
+
+
+def _common_prefix_len(a: List[str], b: List[str]) -> int:
+    """Count leading lines shared by both sequences."""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix_len(a: List[str], b: List[str], start: int = 0) -> int:
+    """Count trailing lines shared by both sequences after index start."""
+    limit = min(len(a), len(b)) - start
+    i = 0
+    while i < limit and a[-1 - i] == b[-1 - i]:
+        i += 1
+    return i
+
+
+def _diff_opcodes(a: List[str], b: List[str], algorithm: str) -> List[tuple]:
+    """Compute diff opcodes, skipping the unchanged head and tail.
+    
+    Args:
+        a: Old lines
+        b: New lines
+        algorithm: Diff algorithm ('histogram' or 'myers')
+        
+    Returns:
+        Opcodes in difflib.SequenceMatcher.get_opcodes() format
+    """
+    prefix = _common_prefix_len(a, b)
+    suffix = _common_suffix_len(a, b, prefix)
+    mid_a = a[prefix:len(a) - suffix]
+    mid_b = b[prefix:len(b) - suffix]
+    
+    if algorithm == 'myers':
+        # autojunk would drop frequent lines like '!' separators and skew the diff
+        mid_opcodes = difflib.SequenceMatcher(None, mid_a, mid_b, autojunk=False).get_opcodes()
+    else:
+        mid_opcodes = histogram_diff.get_opcodes(mid_a, mid_b)
+    
+    opcodes = []
+    if prefix:
+        opcodes.append(('equal', 0, prefix, 0, prefix))
+    for tag, i1, i2, j1, j2 in mid_opcodes:
+        opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        opcodes.append(('equal', len(a) - suffix, len(a), len(b) - suffix, len(b)))
+    
+    return opcodes
+
 
 class ConfigManager:
     """Manages RTX830 configuration operations."""
     
+    # Digest of the last running config fetched from a device; backup
+    # directories may be shared, so the name identifies the device
+    _RUNNING_DIGEST_FILE = ".last_running.{host}-{params}.digest"
+    
+    # Backup file names: <prefix><timestamp>[_<suffix>]<.txt or .txt.zst>
+    _PREFIX = "rtx830_config_"
+    _SUFFIX = ".txt"
+    _COMPRESSED_SUFFIX = _SUFFIX + ".zst"
+    _BACKUP_SUFFIXES = (_SUFFIX, _COMPRESSED_SUFFIX)
+    
+    # Backups younger than this are reused instead of taking a new one before restore
+    _BACKUP_REUSE_SECONDS = 60
+    
     def __init__(self, config: RTXConfig):
         """Initialize configuration manager.
         
@@ -26,6 +204,9 @@ class ConfigManager:
         self.config = config
         self.backup_dir = Path(config.backup.directory).expanduser()
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        
+        # (monotonic time, path) of the last backup taken by this manager
+        self._last_backup_cache: Optional[Tuple[float, Path]] = None
     
     def backup_config(self, connection: RTXConnection, suffix: str = "") -> Path:
         """Backup current RTX830 configuration.
@@ -37,11 +218,16 @@ class ConfigManager:
         Returns:
             Path to backup file
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"rtx830_config_{timestamp}"
+        now = datetime.now()
+        timestamp = (
+            f"{now.year:04d}{now.month:02d}{now.day:02d}_"
+            f"{now.hour:02d}{now.minute:02d}{now.second:02d}"
+        )
+        filename = f"{self._PREFIX}{timestamp}"
         if suffix:
             filename += f"_{suffix}"
-        filename += ".txt"
+        compress = self.config.backup.compression == 'zstd'
+        filename += self._COMPRESSED_SUFFIX if compress else self._SUFFIX
         
         backup_file = self.backup_dir / filename
         
@@ -49,9 +235,14 @@ class ConfigManager:
             logger.info(f"Creating backup: {backup_file}")
             config_data = connection.get_running_config()
             
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                f.write(config_data)
+            data = config_data.encode('utf-8')
+            if compress:
+                data = _require_zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
             
+            _write_bytes(backup_file, data)
+            
+            self._remember_running_config(config_data)
+            self._last_backup_cache = (time.monotonic(), backup_file)
             logger.info(f"Backup created successfully: {backup_file}")
             return backup_file
             
@@ -59,26 +250,48 @@ class ConfigManager:
             raise RuntimeError(f"Failed to create backup: {e}")
     
     def apply_config(self, connection: RTXConnection, config_file: Path, 
-                    create_backup: bool = True) -> Dict[str, Any]:
+                    create_backup: bool = True, force: bool = False) -> Dict[str, Any]:
         """Apply configuration to RTX830.
         
         Args:
             connection: Active RTX connection
             config_file: Path to configuration file to apply
             create_backup: Whether to create backup before applying
+            force: Apply even if the file matches the last known running config
             
         Returns:
             Dictionary with operation results
         """
-        if not config_file.exists():
-            raise FileNotFoundError(f"Configuration file not found: {config_file}")
+        file_data = self._read_config_file(config_file)
+        return self._apply_config_data(connection, config_file, file_data, create_backup, force)
+    
+    def _apply_config_data(self, connection: RTXConnection, config_file: Path,
+                           file_data: bytes, create_backup: bool,
+                           force: bool) -> Dict[str, Any]:
+        """Apply configuration file contents that were already read.
         
+        Args:
+            connection: Active RTX connection
+            config_file: Path the contents were read from
+            file_data: Raw configuration file contents
+            create_backup: Whether to create backup before applying
+            force: Apply even if the contents match the last known running config
+            
+        Returns:
+            Dictionary with operation results
+        """
         results = {
             'backup_file': None,
             'applied': False,
+            'skipped': False,
             'error': None
         }
         
+        if not force and self._matches_last_running_config(file_data):
+            logger.info(f"Configuration file matches last known running config, skipping: {config_file}")
+            results['skipped'] = True
+            return results
+        
         try:
             # Create backup if requested
             if create_backup:
@@ -86,20 +299,22 @@ class ConfigManager:
                     connection, f"before_apply_{config_file.stem}"
                 )
             
-            # Read configuration commands
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_content = f.read()
-            
             # Parse commands (skip comments and empty lines)
-            commands = []
-            for line in config_content.split('\n'):
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    commands.append(line)
+            commands = [
+                command for command in (
+                    line.decode('utf-8').strip() for line in _COMMAND_LINE_RE.findall(file_data)
+                )
+                if command and not command.startswith('#')
+            ]
             
             if not commands:
                 raise ValueError("No valid configuration commands found")
             
+            # The device changes as soon as commands are sent, even if sending
+            # fails partway, so the cached digest and backup are stale from here on
+            self._forget_running_config()
+            self._last_backup_cache = None
+            
             # Apply configuration
             logger.info(f"Applying {len(commands)} configuration commands")
             output = connection.send_config_commands(commands)
@@ -117,39 +332,153 @@ class ConfigManager:
         
         return results
     
-    def get_config_diff(self, connection: RTXConnection, config_file: Path) -> str:
+    def get_config_diff(self, connection: RTXConnection, config_file: Path,
+                        algorithm: str = 'histogram', context: int = 3,
+                        force: bool = False) -> str:
         """Compare current configuration with a file.
         
         Args:
             connection: Active RTX connection
             config_file: Path to configuration file to compare
+            algorithm: Diff algorithm ('histogram' or 'myers')
+            context: Number of context lines around changes
+            force: Fetch the running config even if the file matches the
+                last known running config
             
         Returns:
-            Unified diff string
+            Unified diff string (empty if the file matches the last known
+            running config)
         """
-        if not config_file.exists():
-            raise FileNotFoundError(f"Configuration file not found: {config_file}")
-        
-        # Get current configuration
-        current_config = connection.get_running_config()
+        if algorithm not in DIFF_ALGORITHMS:
+            raise ValueError(f"Unknown diff algorithm: {algorithm}")
         
         # Read file configuration
-        with open(config_file, 'r', encoding='utf-8') as f:
-            file_config = f.read()
+        file_data = self._read_config_file(config_file)
+        file_digest = _fingerprint(file_data)
         
-        # Generate diff
-        current_lines = current_config.splitlines(keepends=True)
-        file_lines = file_config.splitlines(keepends=True)
+        if not force and self._last_running_digest() == file_digest:
+            logger.info("Configuration file matches last known running config")
+            return ''
         
-        diff = difflib.unified_diff(
+        # Get current configuration
+        current_config = connection.get_running_config()
+        
+        # Identical configs need no diff; the digest is computed for the cache anyway
+        if self._remember_running_config(current_config) == file_digest:
+            return ''
+        
+        # Generate diff (lines without endings keep the lists small)
+        current_lines = current_config.splitlines()
+        del current_config
+        file_lines = file_data.decode('utf-8').splitlines()
+        del file_data
+        fromfile = f'Current RTX830 Config ({self.config.rtx_connection.host})'
+        tofile = f'File Config ({config_file.name})'
+        
+        opcodes = _diff_opcodes(current_lines, file_lines, algorithm)
+        buf = io.StringIO()
+        buf.writelines(histogram_diff.format_unified(
             current_lines,
             file_lines,
-            fromfile=f'Current RTX830 Config ({self.config.rtx_connection.host})',
-            tofile=f'File Config ({config_file.name})',
-            lineterm=''
+            opcodes,
+            fromfile=fromfile,
+            tofile=tofile,
+            n=context,
+            lineterm='\n'
+        ))
+        
+        return buf.getvalue()
+    
+    def _read_config_file(self, config_file: Path) -> bytes:
+        """Read configuration file contents.
+        
+        Args:
+            config_file: Path to configuration file
+            
+        Returns:
+            Raw file contents, decompressed if the file is a .zst backup
+            
+        Raises:
+            FileNotFoundError: If file not found
+            RuntimeError: If file cannot be read
+        """
+        try:
+            data = _read_bytes(config_file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found: {config_file}")
+        except OSError as e:
+            raise RuntimeError(f"Failed to read configuration file {config_file}: {e}")
+        
+        # Compressed backups
+        if config_file.suffix == '.zst':
+            zstd = _require_zstandard()
+            try:
+                # One-shot decompression checks the frame's recorded content
+                # size, so truncated files fail instead of yielding a partial config
+                data = zstd.ZstdDecompressor().decompress(data)
+            except zstd.ZstdError as e:
+                raise RuntimeError(f"Failed to decompress configuration file {config_file}: {e}")
+        
+        return data
+    
+    def _running_digest_path(self) -> Path:
+        """Get path of the running configuration digest for this device.
+        
+        Returns:
+            Digest file path in the backup directory
+        """
+        conn = self.config.rtx_connection
+        params = f"{conn.username}@{conn.host}:{conn.port}"
+        return self.backup_dir / self._RUNNING_DIGEST_FILE.format(
+            host=re.sub(r"[^\w.-]", "_", conn.host),
+            params=hashlib.sha256(params.encode('utf-8')).hexdigest()[:12],
         )
+    
+    def _remember_running_config(self, config_data: str) -> str:
+        """Store digest of the running configuration fetched from the device.
         
-        return ''.join(diff)
+        Args:
+            config_data: Running configuration text
+            
+        Returns:
+            Digest of the running configuration
+        """
+        digest = _fingerprint(config_data.encode('utf-8'))
+        try:
+            self._running_digest_path().write_text(digest, encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Failed to store running config digest: {e}")
+        return digest
+    
+    def _forget_running_config(self) -> None:
+        """Discard the stored running configuration digest."""
+        try:
+            self._running_digest_path().unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to remove running config digest: {e}")
+    
+    def _matches_last_running_config(self, file_data: bytes) -> bool:
+        """Check file contents against the last known running configuration.
+        
+        Args:
+            file_data: Raw configuration file contents
+            
+        Returns:
+            True if the digests match
+        """
+        cached = self._last_running_digest()
+        return cached is not None and _fingerprint(file_data) == cached
+    
+    def _last_running_digest(self) -> Optional[str]:
+        """Get the stored running configuration digest.
+        
+        Returns:
+            Digest, or None if none is stored
+        """
+        try:
+            return self._running_digest_path().read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
     
     def restore_from_backup(self, connection: RTXConnection, backup_file: Path) -> bool:
         """Restore configuration from backup.
@@ -161,49 +490,99 @@ class ConfigManager:
         Returns:
             True if restore successful
         """
-        if not backup_file.exists():
+        # Read before taking a backup so a missing file fails early
+        try:
+            file_data = self._read_config_file(backup_file)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Backup file not found: {backup_file}")
         
         logger.info(f"Restoring configuration from: {backup_file}")
         
-        # Create backup of current state before restore
-        self.backup_config(connection, "before_restore")
+        # Create backup of current state before restore, unless one was just taken
+        recent_backup = self._recent_backup()
+        if recent_backup is not None:
+            logger.info(f"Reusing recent backup: {recent_backup}")
+        else:
+            self.backup_config(connection, "before_restore")
         
         # Apply backup configuration
-        results = self.apply_config(connection, backup_file, create_backup=False)
+        results = self._apply_config_data(
+            connection, backup_file, file_data, create_backup=False, force=False
+        )
         
-        if results['applied']:
+        if results['applied'] or results['skipped']:
             logger.info("Configuration restored successfully")
             return True
         else:
             logger.error(f"Failed to restore configuration: {results['error']}")
             return False
     
-    def list_backups(self) -> List[Dict[str, Any]]:
-        """List all backup files.
+    def _recent_backup(self) -> Optional[Path]:
+        """Get the last backup taken by this manager if it is still recent.
         
         Returns:
-            List of backup file information
+            Path to the backup, or None if there is no recent backup
         """
-        backups = []
+        if self._last_backup_cache is None:
+            return None
         
-        for backup_file in self.backup_dir.glob("rtx830_config_*.txt"):
+        created, backup_file = self._last_backup_cache
+        if time.monotonic() - created > self._BACKUP_REUSE_SECONDS or not backup_file.exists():
+            return None
+        return backup_file
+    
+    def _scan_backups(self):
+        """Iterate over plain and compressed backup files.
+        
+        Yields:
+            os.DirEntry for each backup file; its stat() result is cached
+        """
+        with os.scandir(self.backup_dir) as it:
+            for entry in it:
+                name = entry.name
+                if (name.startswith(self._PREFIX)
+                        and name.endswith(self._BACKUP_SUFFIXES)
+                        and entry.is_file()):
+                    yield entry
+    
+    def iter_backups(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over backup files in directory order.
+        
+        Yields:
+            Backup file information, as returned by list_backups()
+        """
+        now_ts = time.time()
+        
+        for entry in self._scan_backups():
             try:
-                stat = backup_file.stat()
-                backups.append({
-                    'file': backup_file,
-                    'name': backup_file.name,
+                stat = entry.stat()
+                yield {
+                    'file': Path(entry.path),
+                    'name': entry.name,
                     'size': stat.st_size,
                     'modified': datetime.fromtimestamp(stat.st_mtime),
-                    'age_days': (datetime.now() - datetime.fromtimestamp(stat.st_mtime)).days
-                })
+                    'age_days': int((now_ts - stat.st_mtime) // 86400)
+                }
             except Exception as e:
-                logger.warning(f"Error reading backup file {backup_file}: {e}")
+                logger.warning(f"Error reading backup file {entry.path}: {e}")
+    
+    def list_backups(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List all backup files.
         
-        # Sort by modification time (newest first)
-        backups.sort(key=lambda x: x['modified'], reverse=True)
+        Args:
+            limit: Return only the newest limit backups
+            
+        Returns:
+            List of backup file information, newest first
+        """
+        key = itemgetter('modified')
+        
+        if limit is not None:
+            # Partial selection, without sorting or keeping every entry
+            return heapq.nlargest(limit, self.iter_backups(), key=key)
         
-        return backups
+        # Sort by modification time (newest first)
+        return sorted(self.iter_backups(), key=key, reverse=True)
     
     def cleanup_old_backups(self) -> int:
         """Remove old backup files based on keep_days setting.
@@ -215,18 +594,18 @@ class ConfigManager:
             logger.info("Backup cleanup disabled (keep_days <= 0)")
             return 0
         
-        cutoff_date = datetime.now() - timedelta(days=self.config.backup.keep_days)
+        # Cutoff follows local wall-clock days like the backup timestamps
+        cutoff_ts = (datetime.now() - timedelta(days=self.config.backup.keep_days)).timestamp()
         removed_count = 0
         
-        for backup_file in self.backup_dir.glob("rtx830_config_*.txt"):
+        for entry in self._scan_backups():
             try:
-                file_time = datetime.fromtimestamp(backup_file.stat().st_mtime)
-                if file_time < cutoff_date:
-                    backup_file.unlink()
+                if entry.stat().st_mtime < cutoff_ts:
+                    os.unlink(entry.path)
                     removed_count += 1
-                    logger.debug(f"Removed old backup: {backup_file}")
+                    logger.debug(f"Removed old backup: {entry.path}")
             except Exception as e:
-                logger.warning(f"Error removing backup file {backup_file}: {e}")
+                logger.warning(f"Error removing backup file {entry.path}: {e}")
         
         if removed_count > 0:
             logger.info(f"Removed {removed_count} old backup files")
@@ -240,29 +619,31 @@ class ConfigManager:
             config_file: Path to configuration file
             
         Returns:
-            Validation results dictionary
+            Validation results dictionary, including the decoded file
+            content if it could be read
         """
         results = {
             'valid': True,
             'errors': [],
             'warnings': [],
-            'command_count': 0
+            'command_count': 0,
+            'content': None
         }
         
-        if not config_file.exists():
-            results['valid'] = False
-            results['errors'].append(f"File not found: {config_file}")
-            return results
-        
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            data = self._read_config_file(config_file)
+            results['content'] = data.decode('utf-8')
             
             command_count = 0
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
+            for line_num, raw_line in _iter_lines(data):
+                raw_line = raw_line.strip()
+                
+                # Skip empty lines and comments before decoding
+                if not raw_line or raw_line.startswith(b'#'):
+                    continue
                 
-                # Skip empty lines and comments
+                # Lines of Unicode whitespace such as U+3000 only show up after decoding
+                line = raw_line.decode('utf-8').strip()
                 if not line or line.startswith('#'):
                     continue
                 
@@ -274,13 +655,11 @@ class ConfigManager:
                         f"Line {line_num}: Very long command ({len(line)} chars)"
                     )
                 
-                # Check for potentially dangerous commands
-                dangerous_patterns = ['format', 'erase', 'delete flash']
-                for pattern in dangerous_patterns:
-                    if pattern in line.lower():
-                        results['warnings'].append(
-                            f"Line {line_num}: Potentially dangerous command: {line}"
-                        )
+                # Check for potentially dangerous commands on the raw bytes
+                if _DANGEROUS_COMMAND_RE.search(raw_line):
+                    results['warnings'].append(
+                        f"Line {line_num}: Potentially dangerous command: {line}"
+                    )
             
             results['command_count'] = command_count
             
@@ -288,6 +667,9 @@ class ConfigManager:
                 results['valid'] = False
                 results['errors'].append("No valid configuration commands found")
             
+        except FileNotFoundError:
+            results['valid'] = False
+            results['errors'].append(f"File not found: {config_file}")
         except Exception as e:
             results['valid'] = False
             results['errors'].append(f"Error reading file: {e}")
@@ -0,0 +1,112 @@
+"""Tests for the local connection agent."""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from rtxconfig import agent
+from rtxconfig.connection import RTXConnectionError
+
+
+class FakeConnection:
+    """RTX connection stand-in served by the agent."""
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_running_config(self):
+        return "ip lan1 address 192.168.0.1/24\n"
+
+
+class FakeProcess:
+    """Agent process stand-in serving a fake connection from a thread."""
+
+    started = []
+
+    def __init__(self, path, delay):
+        FakeProcess.started.append(self)
+        self.returncode = None
+        self.stdin = self
+        self.server = None
+
+        def serve():
+            time.sleep(delay)
+            self.server = agent._AgentServer(path, FakeConnection(), 0.5)
+            while not self.server.idle:
+                self.server.handle_request()
+            self.server.server_close()
+
+        self.thread = threading.Thread(target=serve, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        pass
+
+    def close(self):
+        pass
+
+    def poll(self):
+        return None
+
+    def terminate(self):
+        pass
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    # AF_UNIX paths are limited to about 100 bytes, tmp_path may be longer
+    runtime_dir = tmp_path / "run"
+    runtime_dir.mkdir(mode=0o700)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(runtime_dir))
+    monkeypatch.chdir(runtime_dir)
+    monkeypatch.setattr(agent, 'socket_path', lambda config: agent.Path("agent.sock"))
+    FakeProcess.started = []
+    return {'host': '192.168.0.1', 'username': 'admin', 'key_file': 'id_ed25519'}
+
+
+def test_concurrent_start_spawns_one_agent(config, monkeypatch):
+    path = agent.socket_path(config)
+    monkeypatch.setattr(agent.subprocess, 'Popen', lambda *args, **kwargs: FakeProcess(path, 0.3))
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(agent.connect_agent(config)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(FakeProcess.started) == 1
+    assert all(result is not None for result in results)
+    assert results[0].get_running_config() == FakeConnection().get_running_config()
+    FakeProcess.started[0].thread.join()
+
+
+@pytest.mark.parametrize("reply", [b"not json\n", b"[]\n", b'{"ok": true}\n'])
+def test_malformed_reply(config, reply):
+    path = agent.socket_path(config)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(1)
+
+    def respond():
+        conn, _ = server.accept()
+        with conn:
+            conn.recv(4096)
+            conn.sendall(reply)
+
+    thread = threading.Thread(target=respond)
+    thread.start()
+    try:
+        with pytest.raises(RTXConnectionError, match="Invalid agent response"):
+            agent.AgentConnection(config, path).get_running_config()
+    finally:
+        thread.join()
+        server.close()
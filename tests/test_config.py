@@ -0,0 +1,69 @@
+"""Tests for configuration file loading."""
+
+import math
+
+import pytest
+from ruamel.yaml import YAML
+
+from rtxconfig import config as config_module
+from rtxconfig.config import ConfigManager
+
+
+SCALARS = [
+    'yes', 'no', 'Yes', 'NO', 'on', 'off', 'On', 'OFF', 'y', 'n',
+    'true', 'false', 'True', 'FALSE',
+    '0', '7', '-7', '+7', '0123', '0o17', '-0o17', '0x1F', '0b101', '1_000', '012_345',
+    '12:30', '1:20:30', '190:20:30',
+    '1.5', '-1.5', '1.', '.5', '1e3', '1.5e-3', '1_000.5', '.inf', '-.Inf', '.nan',
+    'null', 'Null', '~', '',
+    '2024-01-01', 'abc', '192.168.0.1', '"0123"', "'yes'",
+]
+
+
+def kind(value):
+    """Python type a scalar resolved to, treating bool separately from int."""
+    for cls in (bool, int, float, str, type(None)):
+        if isinstance(value, cls):
+            return cls
+    return type(value)
+
+
+@pytest.mark.skipif(config_module._ConfigLoader is None, reason="libyaml not available")
+@pytest.mark.parametrize("scalar", SCALARS)
+def test_scalars_resolve_like_ruamel(tmp_path, scalar):
+    text = f"value: {scalar}\nlist:\n  - {scalar}\n"
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(text, encoding='utf-8')
+
+    loaded = ConfigManager(str(config_file))._load_raw()
+    expected = YAML().load(text)
+
+    for actual, wanted in ((loaded['value'], expected['value']), (loaded['list'][0], expected['list'][0])):
+        assert kind(actual) is kind(wanted)
+        if isinstance(wanted, float) and math.isnan(wanted):
+            assert math.isnan(actual)
+        else:
+            assert actual == wanted
+
+
+def test_config_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / "cache"))
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(
+        "rtx_connection:\n"
+        "  host: 192.168.0.1\n"
+        "  username: admin\n"
+        "  key_file: ~/.ssh/id_ed25519\n"
+        "  secret: '0123'\n",
+        encoding='utf-8'
+    )
+
+    fresh = ConfigManager(str(config_file)).load_config()
+    cache_dir = tmp_path / "cache" / "rtxconfig"
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+    assert [p.suffix for p in cache_dir.iterdir()] == ['.json']
+
+    cached = ConfigManager(str(config_file))._load_cached_config()
+    assert cached is not None
+    assert cached.model_dump() == fresh.model_dump()
+    assert cached.rtx_connection.secret == '0123'
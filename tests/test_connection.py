@@ -0,0 +1,111 @@
+"""Tests for RTX830 connection helpers."""
+
+import io
+import socket
+import time
+
+import pytest
+
+from rtxconfig.connection import RTXConnection, RTXConnectionError
+
+
+class FakeChannel:
+    """Paramiko channel replaying chunks, with delays given as floats."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.ready_at = time.monotonic()
+
+    def _next_delay(self):
+        if self.chunks and isinstance(self.chunks[0], float):
+            self.ready_at = time.monotonic() + self.chunks.pop(0)
+
+    def recv(self, size):
+        self._next_delay()
+        if not self.chunks:
+            raise socket.timeout()
+        time.sleep(max(0.0, self.ready_at - time.monotonic()))
+        return self.chunks.pop(0)
+
+    def recv_ready(self):
+        self._next_delay()
+        return bool(self.chunks) and time.monotonic() >= self.ready_at
+
+    def gettimeout(self):
+        return None
+
+    def settimeout(self, timeout):
+        pass
+
+
+class FakeNetmiko:
+    """Minimal netmiko connection around a fake channel."""
+
+    base_prompt = ""
+
+    def __init__(self, channel):
+        self.remote_conn = channel
+
+    def clear_buffer(self):
+        pass
+
+    def write_channel(self, data):
+        pass
+
+    def normalize_cmd(self, command):
+        return command + "\n"
+
+    def is_alive(self):
+        return True
+
+
+def stream(chunks):
+    """Run stream_command over chunks, returning output and unread chunks."""
+    conn = RTXConnection.__new__(RTXConnection)
+    conn.config = {'timeout': 1}
+    channel = FakeChannel(chunks)
+    conn.connection = FakeNetmiko(channel)
+    fh = io.BytesIO()
+    written = conn.stream_command("show config", fh)
+    assert written == len(fh.getvalue())
+    return fh.getvalue(), channel.chunks
+
+
+class TestStreamCommand:
+    """Tests for stream_command()."""
+
+    def test_stops_at_prompt(self):
+        output, rest = stream([b"> show config\r\nip lan1 address 192.168.0.1/24\r\nsave\r\n> "])
+        assert output == b"ip lan1 address 192.168.0.1/24\nsave\n"
+        assert rest == []
+
+    def test_echo_split_across_chunks(self):
+        output, _ = stream([b"> show ", b"config\r", b"\nsave\r\n> "])
+        assert output == b"save\n"
+
+    def test_comment_at_chunk_boundary(self):
+        output, rest = stream([b"> show config\r\n# RTX830\r\n# ", 0.05, b"Rev.15\r\nsave\r\n> "])
+        assert output == b"# RTX830\n# Rev.15\nsave\n"
+        assert rest == []
+
+    def test_prompt_like_line_followed_by_data(self):
+        output, rest = stream([b"> show config\r\nx\r\n> ", 0.05, b"more\r\n> "])
+        assert output == b"x\n> more\n"
+        assert rest == []
+
+    def test_administrator_prompt(self):
+        output, _ = stream([b"# show config\r\nsave\r\n# "])
+        assert output == b"save\n"
+
+    def test_data_after_idle_wait_is_not_read(self):
+        output, rest = stream([b"> show config\r\nsave\r\n> ", 0.5, b"late"])
+        assert output == b"save\n"
+        assert rest == [b"late"]
+
+    def test_timeout(self):
+        with pytest.raises(RTXConnectionError, match="Timed out"):
+            stream([b"> show config\r\nsave\r\n"])
+
+    def test_connection_closed(self):
+        with pytest.raises(RTXConnectionError, match="Connection closed"):
+            stream([b"> show config\r\n", b""])
@@ -0,0 +1,191 @@
+"""Tests for histogram diff."""
+
+import difflib
+import random
+
+import pytest
+
+from rtxconfig import histogram_diff
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a and opcodes, checking that equal ranges really match."""
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+def check_opcodes(a, b, opcodes):
+    """Check that opcodes are contiguous and describe the edit from a to b."""
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    assert apply_opcodes(a, b, opcodes) == b
+
+
+def block_config(n):
+    """Config made of blocks sharing all lines except a unique header."""
+    return [f"tunnel select {i // 10}" if i % 10 == 0 else f" line {i % 10}" for i in range(n)]
+
+
+class TestGetOpcodes:
+    """Tests for get_opcodes()."""
+
+    def test_identical(self):
+        lines = ["a", "b", "c"]
+        assert histogram_diff.get_opcodes(lines, lines) == [('equal', 0, 3, 0, 3)]
+
+    @pytest.mark.parametrize("a, b", [
+        ([], []),
+        ([], ["a", "b"]),
+        (["a", "b"], []),
+    ])
+    def test_empty(self, a, b):
+        check_opcodes(a, b, histogram_diff.get_opcodes(a, b))
+
+    def test_replace(self):
+        a = ["ip lan1 address 192.168.0.1/24", "ip lan2 address dhcp", "save"]
+        b = ["ip lan1 address 192.168.1.1/24", "ip lan2 address dhcp", "save"]
+        assert histogram_diff.get_opcodes(a, b) == [
+            ('replace', 0, 1, 0, 1),
+            ('equal', 1, 3, 1, 3),
+        ]
+
+    def test_anchors_on_unique_lines(self):
+        # Frequent '!' separators must not be matched across moved blocks
+        a = ["!", "ip route a", "!", "ip route b", "!"]
+        b = ["!", "ip route b", "!", "ip route a", "!"]
+        opcodes = histogram_diff.get_opcodes(a, b)
+        check_opcodes(a, b, opcodes)
+        matched = [line for tag, i1, i2, _, _ in opcodes if tag == 'equal' for line in a[i1:i2]]
+        assert any(line.startswith("ip route") for line in matched)
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_edits(self, seed):
+        rng = random.Random(seed)
+        vocab = [f"line {i}" for i in range(rng.choice([3, 20, 200]))]
+        a = [rng.choice(vocab) for _ in range(rng.randrange(0, 300))]
+        b = list(a)
+        for _ in range(rng.randrange(0, 10)):
+            k = rng.randrange(len(b) + 1)
+            if rng.random() < 0.5:
+                del b[k:k + rng.randrange(1, 5)]
+            else:
+                b[k:k] = [rng.choice(vocab + ["new"]) for _ in range(rng.randrange(1, 5))]
+        check_opcodes(a, b, histogram_diff.get_opcodes(a, b))
+
+    @pytest.mark.parametrize("reorder", [
+        lambda lines: lines[::-1],
+        lambda lines: random.Random(0).sample(lines, len(lines)),
+    ])
+    def test_reordered(self, reorder):
+        a = block_config(2000)
+        b = reorder(a)
+        check_opcodes(a, b, histogram_diff.get_opcodes(a, b))
+
+
+class CountingList(list):
+    """List counting element reads, as a measure of diff work."""
+
+    reads = 0
+
+    def __getitem__(self, index):
+        CountingList.reads += 1
+        return super().__getitem__(index)
+
+
+def lcs_length(a, b):
+    """Length of the longest common subsequence."""
+    row = [0] * (len(b) + 1)
+    for x in a:
+        previous = 0
+        for j, y in enumerate(b):
+            previous, row[j + 1] = row[j + 1], previous + 1 if x == y else max(row[j + 1], row[j])
+    return row[-1]
+
+
+class TestMyers:
+    """Tests for the Myers fallback on regions without anchors."""
+
+    @pytest.mark.parametrize("seed", range(30))
+    def test_optimal(self, seed):
+        rng = random.Random(seed)
+        a = [rng.choice("abc") for _ in range(rng.randrange(1, 40))]
+        b = [rng.choice("abc") for _ in range(rng.randrange(1, 40))]
+        blocks, _ = histogram_diff._myers_matching_blocks(a, b, 0, len(a), 0, len(b), 10 ** 6)
+        blocks.sort()
+        check_opcodes(a, b, histogram_diff.get_opcodes(a, b))
+        assert all(a[i:i + n] == b[j:j + n] for i, j, n in blocks)
+        assert sum(n for _, _, n in blocks) == lcs_length(a, b)
+
+    def test_budget_exceeded(self):
+        a = list("ab" * 50)
+        with pytest.raises(histogram_diff._BudgetExceeded):
+            histogram_diff._myers_matching_blocks(a, a[::-1], 0, 100, 0, 100, 100)
+
+
+class TestWorkBudget:
+    """Tests for bounding diff work on pathological input."""
+
+    @pytest.mark.parametrize("n", [2000, 8000, 20000])
+    @pytest.mark.parametrize("reorder", [
+        lambda lines: lines[::-1],
+        lambda lines: sorted(lines),
+        lambda lines: [lines[i ^ 1] for i in range(len(lines))],
+        lambda lines: random.Random(0).sample(lines, len(lines)),
+    ])
+    def test_repetitive_reordered_input(self, n, reorder):
+        a = [f"l{i % 70}" for i in range(n)]
+        b = reorder(a)
+        CountingList.reads = 0
+        opcodes = histogram_diff.get_opcodes(CountingList(a), CountingList(b))
+        budget = max(histogram_diff.MIN_WORK, histogram_diff.WORK_PER_LINE * 2 * n)
+        assert CountingList.reads <= 4 * budget
+        check_opcodes(a, b, opcodes)
+
+    def test_exhausted_budget_leaves_region_unmatched(self, monkeypatch):
+        monkeypatch.setattr(histogram_diff, 'MIN_WORK', 0)
+        monkeypatch.setattr(histogram_diff, 'WORK_PER_LINE', 0)
+        a = ["a", "b", "c"]
+        b = ["a", "x", "c"]
+        assert histogram_diff.get_opcodes(a, b) == [('replace', 0, 3, 0, 3)]
+
+    def test_regular_edits_stay_within_budget(self):
+        a = [f"ip route 10.0.{i}.0/24 gateway 192.168.0.1" for i in range(5000)]
+        b = a[:1000] + ["ip route 0.0.0.0/0 gateway pp 1"] + a[1010:]
+        blocks = histogram_diff.get_matching_blocks(a, b)
+        assert blocks == [(0, 0, 1000), (1010, 1001, 3990), (5000, 4991, 0)]
+
+
+class TestFormatUnified:
+    """Tests for format_unified()."""
+
+    @pytest.mark.parametrize("n", [0, 1, 3])
+    def test_matches_difflib(self, n):
+        rng = random.Random(n)
+        a = [f"line {i}" for i in range(100)]
+        b = list(a)
+        for k in sorted(rng.sample(range(100), 8), reverse=True):
+            b[k:k + 1] = [f"changed {k}"] if k % 2 else []
+        opcodes = difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+        expected = list(difflib.unified_diff(a, b, "old", "new", n=n, lineterm=""))
+        assert list(histogram_diff.format_unified(a, b, opcodes, "old", "new", n=n)) == expected
+
+    def test_no_changes(self):
+        lines = ["a", "b"]
+        opcodes = histogram_diff.get_opcodes(lines, lines)
+        assert list(histogram_diff.format_unified(lines, lines, opcodes)) == []
+
+    def test_lineterm(self):
+        a, b = ["a"], ["b"]
+        output = list(histogram_diff.format_unified(
+            a, b, histogram_diff.get_opcodes(a, b), "old", "new", lineterm="\n"
+        ))
+        assert output == ["--- old\n", "+++ new\n", "@@ -1 +1 @@\n", "-a\n", "+b\n"]